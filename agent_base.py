@@ -0,0 +1,138 @@
+"""
+Agent Base - The cache -> truncate -> call Claude -> cache flow every agent shares.
+
+Subclasses set schema, tool_name, prompt_version and system_prompt, and
+implement _user_message() and _max_tokens() (plus _failure() if the schema
+defaults aren't the right failure result). Their public methods call _run()
+or _run_async(), so the caching, truncation, request and _meta rules live in
+one place.
+
+Usage:
+    from agent_base import Agent
+
+    class MyAgent(Agent):
+        schema = MyResult
+        tool_name = "emit_my_result"
+        prompt_version = "v1"
+        system_prompt = SYSTEM_PROMPT
+
+        def _user_message(self, document_text: str) -> str:
+            return f"Summarise this document:\n\n{document_text}"
+
+        def _max_tokens(self, document_text: str) -> int:
+            return 500
+
+        @timed("my_agent.run")
+        def run(self, document_text: str) -> dict:
+            return self._run(document_text)
+"""
+
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+
+import cache
+from config import ANTHROPIC_MODEL
+from llm_utils import create_validated, create_validated_async, get_async_client, get_client, truncate_text
+
+
+class Agent(ABC):
+    """Calls Claude for one kind of structured result, with on-disk caching."""
+
+    schema: type[BaseModel]
+    tool_name: str
+    prompt_version: str  # bump to invalidate this agent's cache entries
+    # A module-level constant in each agent. Prompt caching only hits when the
+    # system block is byte-identical across calls, so never format into it.
+    system_prompt: str
+
+    def __init__(self):
+        self.client = get_client()
+        self.async_client = get_async_client()
+        self.model = ANTHROPIC_MODEL
+
+    def _run(self, document_text: str) -> dict:
+        """Return the cached result for document_text, or call Claude and cache it."""
+        key = self._cache_key(document_text)
+        cached = self._from_cache(key)
+        if cached is not None:
+            return cached
+
+        sent_text = truncate_text(document_text)
+        parsed, error, usage = create_validated(
+            self.client, self.schema, self.tool_name, **self._build_request(sent_text)
+        )
+        return self._store(key, self._to_result(
+            parsed, error, input_chars=len(document_text), sent_chars=len(sent_text), usage=usage
+        ))
+
+    async def _run_async(self, document_text: str, on_json: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        Async version of _run(). Calls go through create_with_retry, so rate
+        limits and server errors are retried; on_json streams the response
+        (see create_validated_async).
+        """
+        key = self._cache_key(document_text)
+        cached = self._from_cache(key)
+        if cached is not None:
+            return cached
+
+        sent_text = truncate_text(document_text)
+        parsed, error, usage = await create_validated_async(
+            self.async_client, self.schema, self.tool_name, on_json=on_json, **self._build_request(sent_text)
+        )
+        return self._store(key, self._to_result(
+            parsed, error, input_chars=len(document_text), sent_chars=len(sent_text), usage=usage
+        ))
+
+    def _cache_key(self, document_text: str) -> str:
+        return cache.make_key("anthropic", type(self).__name__, self.model, self.prompt_version, document_text)
+
+    def _from_cache(self, key: str):
+        """Return the cached result for key with fresh _meta, or None on a miss."""
+        result = cache.get(key)
+        if result is not None:
+            result["_meta"] = self._meta(cached=True)
+        return result
+
+    def _store(self, key: str, result: dict) -> dict:
+        """Cache a successfully parsed result and pass it through."""
+        if "error" not in result:
+            cache.put(key, result)
+        return result
+
+    def _meta(self, **extra) -> dict:
+        """The _meta entry for a result: model and prompt_version, plus extra."""
+        return {"model": self.model, "prompt_version": self.prompt_version, **extra}
+
+    @abstractmethod
+    def _user_message(self, document_text: str) -> str:
+        """The user turn sent with (already truncated) document_text."""
+
+    @abstractmethod
+    def _max_tokens(self, document_text: str) -> int:
+        """Output token budget for document_text."""
+
+    def _failure(self, error: str) -> BaseModel:
+        """Result to return (with the error) when Claude never produced valid output."""
+        return self.schema()
+
+    def _build_request(self, document_text: str) -> dict:
+        """Build the messages.create arguments for a document."""
+        return {
+            "model": self.model,
+            "max_tokens": self._max_tokens(document_text),
+            # cache_control marks the static system block for Anthropic prompt caching
+            "system": [{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}],
+            "messages": [{"role": "user", "content": self._user_message(document_text)}],
+        }
+
+    def _to_result(self, parsed: Optional[BaseModel], error: Optional[str], **meta) -> dict:
+        """Turn the validated tool output into a result dict (extra keyword args go in _meta)."""
+        if parsed is not None:
+            result = parsed.model_dump()
+        else:
+            result = self._failure(error).model_dump() | {"error": error}
+        result["_meta"] = self._meta(**meta)
+        return result
@@ -0,0 +1,65 @@
+"""
+Cache - Local on-disk cache for agent results.
+
+Results are keyed by (provider, agent, model, prompt_version, document text), so
+re-running an agent on the same document skips the Claude call entirely.
+Bumping an agent's prompt_version invalidates its old entries.
+
+Entries are JSON files under .llm_cache/ (override with LLM_CACHE_DIR in .env).
+Delete the directory to clear the cache.
+
+Usage:
+    import cache
+
+    key = cache.make_key("anthropic", "RouterAgent", model, prompt_version, document_text)
+    result = cache.get(key)
+    if result is None:
+        result = call_claude(...)
+        cache.put(key, result)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+from config import LLM_CACHE_DIR as CACHE_DIR
+
+
+def make_key(provider: str, agent: str, model: str, prompt_version: str, document_text: str) -> str:
+    """Return the sha256 hex digest identifying this request."""
+    raw = f"{provider}|{agent}|{model}|{prompt_version}|{document_text}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def get(key: str) -> Optional[dict]:
+    """
+    Look up a cached result.
+
+    Returns:
+        The cached result dict, or None on a miss (or unreadable entry)
+    """
+    try:
+        with open(_path(key), "r") as f:
+            return json.load(f)["value"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def put(key: str, value: dict) -> None:
+    """Store a result (without its _meta) along with a UTC timestamp."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    entry = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "value": {k: v for k, v in value.items() if k != "_meta"},
+    }
+    # Write then rename so concurrent readers never see a partial file
+    tmp_path = f"{_path(key)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, _path(key))
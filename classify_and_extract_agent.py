@@ -0,0 +1,146 @@
+"""
+Classify and Extract Agent - Classifies a document and extracts invoice data in one call.
+
+Does the work of router_agent + invoice_agent with a single Claude request,
+so the document is only sent (and prefilled) once.
+
+Usage:
+    from classify_and_extract_agent import ClassifyAndExtractAgent
+
+    agent = ClassifyAndExtractAgent()
+    result = agent.run("text content of document")
+    if result["document_type"] == "invoice":
+        print(result["invoice"])
+
+    # Or from async code
+    result = await agent.run_async("text content of document")
+"""
+
+import json
+
+from agent_base import Agent
+from llm_utils import estimate_max_tokens
+from router_agent import ROUTER_MAX_TOKENS
+from schemas import ClassifyAndExtractResult
+from telemetry import timed
+
+
+TOOL_NAME = "emit_document"
+
+SYSTEM_PROMPT = """You are a document classification and extraction agent for a property development company.
+
+Your job is to look at a document and:
+1. Determine what TYPE of document it is
+2. Extract key metadata
+3. If (and only if) it is an invoice, extract the full invoice details
+
+Document types:
+- invoice: A bill requesting payment for goods/services
+- progress_claim: A claim from a contractor for completed work stages
+- contract: A formal agreement between parties
+- variation: A change order or amendment to existing contract
+- settlement: Property settlement statement
+- unknown: Cannot determine
+
+Confidence scoring:
+- 0.9+ : Document explicitly states its type (e.g., "TAX INVOICE" header)
+- 0.7-0.9 : Strongly implied by format and content
+- 0.5-0.7 : Reasonable guess based on content
+- Below 0.5 : Uncertain, might need human review
+
+ABN format: XX XXX XXX XXX (Australian Business Number)
+Date format: YYYY-MM-DD
+Currency: numeric only, no symbols (e.g., 1500.00 not $1,500.00)
+
+Record your answer by calling the emit_document tool. Example input:
+{
+    "document_type": "invoice",
+    "metadata": {
+        "confidence": 0.95,
+        "vendor_name": "Smith Constructions Pty Ltd",
+        "project_name": "Balmoral Estate",
+        "document_date": "2024-03-15",
+        "amount": 24200.00,
+        "reasoning": "Document has TAX INVOICE header, ABN, GST breakdown..."
+    },
+    "invoice": {
+        "invoice_number": "INV-2024-001",
+        "vendor_name": "Smith Constructions Pty Ltd",
+        "vendor_abn": "12 345 678 901",
+        "invoice_date": "2024-03-15",
+        "due_date": "2024-03-29",
+        "project_reference": "Balmoral Estate - Lot 42",
+        "description": "Concrete slab pour and related works",
+        "line_items": [
+            {"description": "Concrete slab pour", "quantity": 1, "unit_price": 15000.00, "amount": 15000.00}
+        ],
+        "subtotal": 22000.00,
+        "gst_amount": 2200.00,
+        "total_inc_gst": 24200.00,
+        "payment_terms": "14 days"
+    }
+}
+
+If document_type is not "invoice", set "invoice" to null.
+If a field cannot be determined, use null."""
+
+
+class ClassifyAndExtractAgent(Agent):
+    """Classifies documents and extracts invoice details in a single call."""
+
+    schema = ClassifyAndExtractResult
+    tool_name = TOOL_NAME
+    prompt_version = "v2"
+    system_prompt = SYSTEM_PROMPT
+
+    @timed("classify_and_extract.run")
+    def run(self, document_text: str) -> dict:
+        """
+        Classify a document and, if it is an invoice, extract its details.
+
+        Args:
+            document_text: The text content of the document
+
+        Returns:
+            dict with keys:
+                - document_type: one of RouterAgent.DOCUMENT_TYPES
+                - metadata: router fields (confidence, vendor_name, project_name,
+                  document_date, amount, reasoning)
+                - invoice: invoice fields, or None if not an invoice
+        """
+        return self._run(document_text)
+
+    @timed("classify_and_extract.run")
+    async def run_async(self, document_text: str) -> dict:
+        """
+        Async version of run().
+
+        Args:
+            document_text: The text content of the document
+
+        Returns:
+            dict with the same keys as run()
+        """
+        return await self._run_async(document_text)
+
+    def _user_message(self, document_text: str) -> str:
+        return f"""Classify this document and extract its data:
+
+---
+{document_text}
+---
+
+Record your answer with the emit_document tool."""
+
+    def _max_tokens(self, document_text: str) -> int:
+        return ROUTER_MAX_TOKENS + estimate_max_tokens(document_text)
+
+
+if __name__ == "__main__":
+    agent = ClassifyAndExtractAgent()
+
+    with open("sample_invoice.txt", "r") as f:
+        test_doc = f.read()
+
+    result = agent.run(test_doc)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,27 @@
+"""
+Config - Loads .env once and exposes settings as module constants.
+
+Import settings from here instead of calling load_dotenv() in each module.
+
+Usage:
+    from config import ANTHROPIC_MODEL
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Anthropic (the client reads ANTHROPIC_API_KEY from the environment itself)
+ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+
+# Azure Document Intelligence (see pdf_utils.py)
+AZURE_DOC_INTEL_ENDPOINT = os.getenv("AZURE_DOC_INTEL_ENDPOINT")
+AZURE_DOC_INTEL_KEY = os.getenv("AZURE_DOC_INTEL_KEY")
+PDF_TEXT_CACHE_DIR = os.getenv("PDF_TEXT_CACHE_DIR", ".pdf_text_cache")
+
+# Local result cache (see cache.py)
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+
+# Per-stage timings (see telemetry.py); empty string disables
+TELEMETRY_PATH = os.getenv("TELEMETRY_PATH", "telemetry.jsonl")
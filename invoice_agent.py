@@ -9,43 +9,53 @@ Usage:
     agent = InvoiceAgent()
     result = agent.extract("invoice text content")
     print(result)
+
+    # Or from async code
+    result = await agent.extract_async("invoice text content")
+
+    # Many invoices at once
+    results = asyncio.run(agent.extract_many(invoice_texts, concurrency=8))
+
+    # After the router: skips the call if the router result is already enough
+    result = agent.extract_if_needed("invoice text content", router_result)
+
+Do NOT concatenate documents into one prompt; use extract_many. Output
+tokens for a combined prompt are generated one after another, while
+separate requests overlap, so extract_many is faster at the same cost.
 """
 
+import asyncio
 import json
-from anthropic import Anthropic
-from dotenv import load_dotenv
+import logging
+import os
+from collections import Counter
+from typing import Optional
 
-load_dotenv()
+from agent_base import Agent
+from llm_utils import estimate_max_tokens, gather_bounded
+from schemas import InvoiceExtraction
+from telemetry import timed
 
 
-class InvoiceAgent:
-    """Extracts structured data from invoice documents."""
-    
-    def __init__(self):
-        self.client = Anthropic()
-        self.model = "claude-sonnet-4-20250514"
-        self.prompt_version = "v1"
-        
-    def extract(self, document_text: str) -> dict:
-        """
-        Extract detailed invoice data.
-        
-        Args:
-            document_text: Text content of the invoice
-            
-        Returns:
-            dict with invoice fields (None for missing fields)
-        """
-        
-        system_prompt = """You are an invoice data extraction agent for a property development company.
+logger = logging.getLogger(__name__)
+
+TOOL_NAME = "emit_invoice"
 
-Extract all invoice details into structured JSON. Be precise with numbers and dates.
+# extract_if_needed trusts router results at least this confident (with an amount)
+SKIP_CONFIDENCE = 0.9
+
+# How often extract_if_needed skipped, triggered or cancelled the detailed call, for tuning
+GATE_COUNTS = Counter()
+
+SYSTEM_PROMPT = """You are an invoice data extraction agent for a property development company.
+
+Extract all invoice details by calling the emit_invoice tool. Be precise with numbers and dates.
 
 ABN format: XX XXX XXX XXX (Australian Business Number)
 Date format: YYYY-MM-DD
 Currency: numeric only, no symbols (e.g., 1500.00 not $1,500.00)
 
-You MUST respond with valid JSON only, no other text:
+Example tool input:
 {
     "invoice_number": "INV-2024-001",
     "vendor_name": "Smith Constructions Pty Ltd",
@@ -65,38 +75,174 @@ You MUST respond with valid JSON only, no other text:
 
 Use null for any field that cannot be determined from the document."""
 
-        user_message = f"""Extract invoice data:
 
----
-{document_text}
----
+class InvoiceAgent(Agent):
+    """Extracts structured data from invoice documents."""
+
+    schema = InvoiceExtraction
+    tool_name = TOOL_NAME
+    prompt_version = "v2"
+    system_prompt = SYSTEM_PROMPT
+        
+    @timed("invoice.extract")
+    def extract(self, document_text: str) -> dict:
+        """
+        Extract detailed invoice data.
+        
+        Args:
+            document_text: Text content of the invoice
+            
+        Returns:
+            dict with invoice fields (None for missing fields)
+        """
+        return self._run(document_text)
 
-Respond with JSON only."""
+    @timed("invoice.extract")
+    async def extract_async(self, document_text: str) -> dict:
+        """
+        Async version of extract().
+        
+        Args:
+            document_text: Text content of the invoice
+            
+        Returns:
+            dict with the same keys as extract()
+        """
+        return await self._run_async(document_text)
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_message}]
-        )
+    def extract_if_needed(self, document_text: str, router_result: dict) -> dict:
+        """
+        Extract invoice data, reusing the router's result when it is confident enough.
         
-        response_text = response.content[0].text
-        response_text = response_text.replace("```json", "").replace("```", "").strip()
+        If the router is at least SKIP_CONFIDENCE sure and found an amount,
+        its fields are promoted to the invoice schema and no call is made.
+        Otherwise this is the same as extract().
+        
+        Args:
+            document_text: Text content of the invoice
+            router_result: RouterAgent.classify() output for the same document
+            
+        Returns:
+            dict with the same keys as extract() (_meta["source"] is "router" when skipped)
+        """
+        if self._router_is_enough(router_result):
+            self._count("skipped")
+            return self._promote(router_result)
+        self._count("triggered")
+        return self.extract(document_text)
+
+    async def extract_if_needed_async(
+        self, document_text: str, router_result: dict, pending: Optional[asyncio.Task] = None
+    ) -> dict:
+        """
+        Async version of extract_if_needed().
+
+        pending is an extract_async(document_text) task started speculatively
+        before the router finished (see orchestrator.route_then_extract). It is
+        awaited instead of making a new call. If the router result is enough,
+        pending is cancelled while still running, but a result it already
+        produced is used rather than thrown away.
+        """
+        if pending is not None and self._succeeded(pending):
+            self._count("triggered")
+            return pending.result()
+        if self._router_is_enough(router_result):
+            if pending is not None and not pending.done():
+                pending.cancel()
+                self._count("cancelled")
+            else:
+                self._count("skipped")
+            return self._promote(router_result)
+        self._count("triggered")
+        if pending is not None:
+            return await pending
+        return await self.extract_async(document_text)
+
+    async def extract_many(
+        self, docs: list[str], concurrency: int = 8, checkpoint_path: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Extract many invoices concurrently, one request per invoice.
         
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            result = {
-                "invoice_number": None, "vendor_name": None, "vendor_abn": None,
-                "invoice_date": None, "due_date": None, "project_reference": None,
-                "description": None, "line_items": [], "subtotal": None,
-                "gst_amount": None, "total_inc_gst": None, "payment_terms": None,
-                "error": f"Failed to parse response: {response_text[:200]}"
-            }
+        Finished invoices are already in the agent cache, so a restarted run
+        doesn't redo them. checkpoint_path additionally appends each result to
+        a JSONL file as it returns; entries are keyed like the cache (model,
+        prompt_version, text), so a prompt bump never reuses stale results.
         
-        result["_meta"] = {"model": self.model, "prompt_version": self.prompt_version}
+        Args:
+            docs: Text content of each invoice
+            concurrency: Max requests in flight (keep under your rate limit)
+            checkpoint_path: JSONL file of completed results (None, the default, to disable)
+            
+        Returns:
+            List of extract() results, in the same order as docs
+        """
+        done = self._load_checkpoint(checkpoint_path)
+
+        async def extract_one(doc: str) -> dict:
+            doc_id = self._cache_key(doc)
+            if doc_id in done:
+                return done[doc_id]
+            result = await self.extract_async(doc)
+            if checkpoint_path:
+                with open(checkpoint_path, "a") as f:
+                    f.write(json.dumps({"doc_id": doc_id, "result": result}) + "\n")
+            return result
+
+        return await gather_bounded(extract_one, docs, concurrency)
+
+    def _load_checkpoint(self, checkpoint_path: Optional[str]) -> dict:
+        """Read successful results from a previous extract_many run, keyed by doc_id."""
+        done = {}
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return done
+        with open(checkpoint_path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial line from an interrupted run
+                if "error" not in record["result"]:
+                    done[record["doc_id"]] = record["result"]
+        return done
+
+    def _router_is_enough(self, router_result: dict) -> bool:
+        """Decide whether the detailed call can be skipped."""
+        return router_result.get("confidence", 0) >= SKIP_CONFIDENCE and bool(router_result.get("amount"))
+
+    @staticmethod
+    def _succeeded(task: asyncio.Task) -> bool:
+        """Whether task has already finished with a usable extract_async() result."""
+        return task.done() and not task.cancelled() and task.exception() is None and "error" not in task.result()
+
+    def _count(self, outcome: str) -> None:
+        """Count a gate outcome: "skipped", "triggered", or "cancelled" for speculative calls cut short."""
+        GATE_COUNTS[outcome] += 1
+        logger.info("Detailed invoice extraction %s (%s)", outcome, dict(GATE_COUNTS))
+
+    def _promote(self, router_result: dict) -> dict:
+        """Map the router's fields onto the invoice schema."""
+        result = InvoiceExtraction(
+            vendor_name=router_result.get("vendor_name"),
+            invoice_date=router_result.get("document_date"),
+            project_reference=router_result.get("project_name"),
+            total_inc_gst=router_result.get("amount"),
+        ).model_dump()
+        result["_meta"] = self._meta(source="router")
         return result
 
+    def _user_message(self, document_text: str) -> str:
+        return f"""Extract invoice data:
+
+---
+{document_text}
+---
+
+Record the data with the emit_invoice tool."""
+
+    def _max_tokens(self, document_text: str) -> int:
+        return estimate_max_tokens(document_text)
+
 
 if __name__ == "__main__":
     agent = InvoiceAgent()
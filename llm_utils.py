@@ -0,0 +1,345 @@
+"""
+LLM Utilities - Shared helpers for calling Claude from the agents.
+
+Agents get their clients from get_client() / get_async_client(), so every
+agent in a process shares one connection pool and constructing agents is
+cheap. The async client is tied to the first event loop that uses it: run
+batches inside a single asyncio.run() rather than one asyncio.run() per doc.
+
+Structured output uses tool-use: create_validated() forces Claude to call a
+tool whose input_schema is a Pydantic model, validates the tool input, and
+feeds validation errors back for another try.
+
+Usage:
+    from llm_utils import create_validated, create_with_retry, gather_bounded, parse_json, truncate_text
+
+    invoice, error, usage = create_validated(client, InvoiceExtraction, "emit_invoice", model=..., messages=...)
+    response = await create_with_retry(async_client, model=..., messages=...)
+    response = await stream_with_retry(async_client, on_json=print, model=..., messages=...)
+    results = await gather_bounded(agent.classify_async, docs, concurrency=8)
+    data = parse_json(response.content[0].text)
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import orjson
+from anthropic import Anthropic, APIConnectionError, APIStatusError, AsyncAnthropic
+from pydantic import BaseModel, ValidationError
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential
+
+T = TypeVar("T")
+R = TypeVar("R")
+M = TypeVar("M", bound=BaseModel)
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+MAX_DOCUMENT_CHARS = 40000  # ~10k tokens; invoice headers and totals fit well within this
+VALIDATION_RETRIES = 2  # extra calls allowed when the tool input fails validation
+MAX_OUTPUT_TOKENS = 2000  # ceiling for estimate_max_tokens and for max_tokens retries
+
+# Opening ```json / ``` fence. Only matched at the start of the (stripped) text,
+# which is much cheaper than a MULTILINE sub over the whole response.
+_FENCE_RE = re.compile(r"```(?:json)?")
+# A money amount like $1,500 or 1,500.00 - lines containing one approximate invoice line items
+_AMOUNT_RE = re.compile(r"\$\s?\d[\d,]*|\d[\d,]*\.\d{2}\b")
+_backoff = wait_exponential(multiplier=1, min=1, max=30)
+
+
+@functools.lru_cache(maxsize=1)
+def get_client() -> Anthropic:
+    """Return the shared sync Anthropic client (created on first use)."""
+    return Anthropic()
+
+
+@functools.lru_cache(maxsize=1)
+def get_async_client() -> AsyncAnthropic:
+    """Return the shared AsyncAnthropic client (created on first use).
+
+    SDK retries are disabled because create_with_retry handles them.
+    """
+    return AsyncAnthropic(max_retries=0)
+
+
+def truncate_text(text: str, max_chars: int = MAX_DOCUMENT_CHARS) -> str:
+    """
+    Cap document text sent to Claude, keeping the start and the end.
+
+    The first 3/4 of the budget comes from the head (headers, parties, line
+    items) and the rest from the tail (totals, payment details).
+
+    Returns:
+        text unchanged if it fits, otherwise head + truncation marker + tail
+    """
+    if len(text) <= max_chars:
+        return text
+    head_chars = max_chars * 3 // 4
+    tail_chars = max_chars - head_chars
+    logger.warning("Truncating document from %d to %d chars", len(text), max_chars)
+    return text[:head_chars] + "\n...[truncated]...\n" + text[-tail_chars:]
+
+
+def estimate_max_tokens(
+    document_text: str, base: int = 300, per_line_item: int = 80, floor: int = 600, cap: int = MAX_OUTPUT_TOKENS
+) -> int:
+    """
+    Size max_tokens for an extraction from how many line items the document seems to have.
+
+    Line items are estimated by counting lines that contain a money amount.
+    Keeping max_tokens close to the expected output bounds worst-case latency
+    and cost if a generation runs away. The floor leaves room for a
+    header-only invoice (every field filled in, a couple of line items), so
+    documents whose amounts aren't recognised don't hit max_tokens retries.
+    """
+    line_items = sum(1 for line in document_text.splitlines() if _AMOUNT_RE.search(line))
+    return max(floor, min(cap, base + per_line_item * line_items))
+
+
+def parse_json(response_text: str):
+    """
+    Parse Claude's JSON response, allowing for a ```json ... ``` fence around it.
+
+    Raises:
+        json.JSONDecodeError (orjson's error subclasses it) if the text isn't valid JSON
+    """
+    response_text = response_text.strip()
+    fence = _FENCE_RE.match(response_text)
+    if fence:
+        end = len(response_text) - 3 if response_text.endswith("```") else len(response_text)
+        response_text = response_text[fence.end():end]
+    return orjson.loads(response_text)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry on rate limits (429), server errors (5xx) and dropped connections."""
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, APIConnectionError)
+
+
+def _wait_retry_after(retry_state) -> float:
+    """Wait for the server's retry-after header if given, else back off exponentially."""
+    exc = retry_state.outcome.exception()
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return _backoff(retry_state)
+
+
+async def create_with_retry(client: AsyncAnthropic, **kwargs):
+    """
+    Call client.messages.create, retrying transient API errors.
+
+    Args:
+        client: AsyncAnthropic client, normally get_async_client()
+        **kwargs: Passed straight through to messages.create
+
+    Returns:
+        The Anthropic Message response
+    """
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception(_is_retryable),
+        wait=_wait_retry_after,
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        reraise=True,
+    ):
+        with attempt:
+            return await client.messages.create(**kwargs)
+
+
+async def stream_with_retry(client: AsyncAnthropic, on_json: Callable[[str], None], **kwargs):
+    """
+    Like create_with_retry, but streams the response and reports tool input as it arrives.
+
+    Args:
+        client: AsyncAnthropic client, normally get_async_client()
+        on_json: Called with the tool input JSON received so far (a partial
+            string) after every input_json_delta
+        **kwargs: Passed straight through to messages.stream
+
+    Returns:
+        The final Anthropic Message, same as create_with_retry
+    """
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception(_is_retryable),
+        wait=_wait_retry_after,
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        reraise=True,
+    ):
+        with attempt:
+            received = ""
+            async with client.messages.stream(**kwargs) as stream:
+                async for event in stream:
+                    if event.type == "input_json":
+                        received += event.partial_json
+                        on_json(received)
+                return await stream.get_final_message()
+
+
+def _with_tool(request: dict, schema: type[BaseModel], tool_name: str) -> dict:
+    """Add a tool built from schema to request and force Claude to call it."""
+    return {
+        **request,
+        "tools": [{
+            "name": tool_name,
+            "description": schema.__doc__ or f"Record the {tool_name} result.",
+            "input_schema": schema.model_json_schema(),
+        }],
+        "tool_choice": {"type": "tool", "name": tool_name},
+    }
+
+
+def _tool_input(response):
+    """Return the input of the first tool_use block, falling back to parsing any text as JSON."""
+    for block in response.content:
+        if block.type == "tool_use":
+            return block.input
+    return parse_json("".join(block.text for block in response.content if block.type == "text"))
+
+
+def _feedback_messages(response, error: Exception) -> list[dict]:
+    """Build the assistant + user turns that tell Claude what was wrong with its output."""
+    feedback = f"Your output had error: {error}. Fix and retry."
+    assistant_content = []
+    tool_use_id = None
+    for block in response.content:
+        if block.type == "tool_use":
+            assistant_content.append({"type": "tool_use", "id": block.id, "name": block.name, "input": block.input})
+            tool_use_id = tool_use_id or block.id
+        elif block.type == "text":
+            assistant_content.append({"type": "text", "text": block.text})
+
+    if tool_use_id is None:
+        user_content = feedback
+    else:
+        user_content = [{"type": "tool_result", "tool_use_id": tool_use_id, "content": feedback, "is_error": True}]
+    return [
+        {"role": "assistant", "content": assistant_content},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def _new_usage() -> dict:
+    return {"input_tokens": 0, "output_tokens": 0, "cache_read_input_tokens": 0}
+
+
+def _add_usage(usage: dict, response) -> None:
+    """Add a response's token counts to a running total."""
+    for field in usage:
+        usage[field] += getattr(response.usage, field, None) or 0
+
+
+def _raise_max_tokens(request: dict) -> bool:
+    """Double request's max_tokens for a retry, up to MAX_OUTPUT_TOKENS. False if it's already there."""
+    if request["max_tokens"] >= MAX_OUTPUT_TOKENS:
+        return False
+    request["max_tokens"] = min(request["max_tokens"] * 2, MAX_OUTPUT_TOKENS)
+    return True
+
+
+def create_validated(
+    client: Anthropic, schema: type[M], tool_name: str, **request
+) -> tuple[Optional[M], Optional[str], dict]:
+    """
+    Get schema-shaped output from Claude via a forced tool call.
+
+    If the tool input fails validation, the error is sent back to Claude and
+    the call is retried (up to VALIDATION_RETRIES times, with a short backoff).
+    A response cut off by max_tokens is retried with double the budget, up to
+    MAX_OUTPUT_TOKENS, so a runaway generation stays bounded.
+
+    Args:
+        client: Anthropic client, normally get_client()
+        schema: Pydantic model the tool input must match
+        tool_name: Name of the tool Claude is made to call
+        **request: messages.create arguments (model, max_tokens, system, messages)
+
+    Returns:
+        (validated model, None, usage) on success, or (None, error message, usage)
+        on failure. usage is token counts summed over all attempts.
+    """
+    messages = list(request.pop("messages"))
+    usage = _new_usage()
+    for attempt in range(VALIDATION_RETRIES + 1):
+        response = client.messages.create(messages=messages, **_with_tool(request, schema, tool_name))
+        _add_usage(usage, response)
+        if getattr(response, "stop_reason", None) == "max_tokens":
+            # A cut-off tool input can still validate (every field is optional), so retry with more room
+            error = f"output was cut off at max_tokens={request['max_tokens']}"
+            if not _raise_max_tokens(request):
+                break
+            continue
+        try:
+            return schema.model_validate(_tool_input(response)), None, usage
+        except (ValidationError, json.JSONDecodeError) as e:
+            error = e
+        if attempt < VALIDATION_RETRIES:
+            time.sleep(1.0 * (attempt + 1))
+            messages += _feedback_messages(response, error)
+    return None, f"Invalid {tool_name} output after {attempt + 1} attempts: {error}", usage
+
+
+async def create_validated_async(
+    client: AsyncAnthropic,
+    schema: type[M],
+    tool_name: str,
+    on_json: Optional[Callable[[str], None]] = None,
+    **request,
+) -> tuple[Optional[M], Optional[str], dict]:
+    """
+    Async version of create_validated(); each call also goes through create_with_retry.
+
+    If on_json is given, responses are streamed (see stream_with_retry) and
+    on_json sees the partial tool input of each attempt as it arrives.
+    """
+    messages = list(request.pop("messages"))
+    usage = _new_usage()
+    for attempt in range(VALIDATION_RETRIES + 1):
+        tool_request = _with_tool(request, schema, tool_name)
+        if on_json is None:
+            response = await create_with_retry(client, messages=messages, **tool_request)
+        else:
+            response = await stream_with_retry(client, on_json, messages=messages, **tool_request)
+        _add_usage(usage, response)
+        if getattr(response, "stop_reason", None) == "max_tokens":
+            # A cut-off tool input can still validate (every field is optional), so retry with more room
+            error = f"output was cut off at max_tokens={request['max_tokens']}"
+            if not _raise_max_tokens(request):
+                break
+            continue
+        try:
+            return schema.model_validate(_tool_input(response)), None, usage
+        except (ValidationError, json.JSONDecodeError) as e:
+            error = e
+        if attempt < VALIDATION_RETRIES:
+            await asyncio.sleep(1.0 * (attempt + 1))
+            messages += _feedback_messages(response, error)
+    return None, f"Invalid {tool_name} output after {attempt + 1} attempts: {error}", usage
+
+
+async def gather_bounded(
+    func: Callable[[T], Awaitable[R]], items: list[T], concurrency: int = 8
+) -> list[R]:
+    """
+    Run func over items concurrently, with at most `concurrency` in flight.
+
+    Keep concurrency under your Anthropic tier's rate limit.
+
+    Returns:
+        Results in the same order as items
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(item: T) -> R:
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(_run(item) for item in items))
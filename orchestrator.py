@@ -0,0 +1,126 @@
+"""
+Orchestrator - Runs PDFs through text extraction and the agents.
+
+Extraction (Azure Document Intelligence) and classification (Claude) run as
+overlapping stages: extractor workers OCR PDFs and put the text on a queue,
+while consumer workers send queued documents to Claude. While one PDF is
+being OCRed, earlier ones are already being classified, so a batch takes
+about as long as its slower stage rather than the sum of both.
+
+By default each document gets one ClassifyAndExtractAgent call. With
+two_stage=True it goes through RouterAgent first, and InvoiceAgent is only
+called for invoices the router wasn't confident about (see
+InvoiceAgent.extract_if_needed). The router's response is streamed, and for
+invoices below SKIP_CONFIDENCE the invoice call starts as soon as the type and
+confidence are out, overlapping the rest of the router's output. If the gate
+then skips it anyway (e.g. a confident router answer changed on retry), an
+unfinished call is cancelled - its input tokens are still billed.
+
+Usage:
+    import asyncio
+    from orchestrator import run_pipeline
+
+    results = asyncio.run(run_pipeline(["a.pdf", "b.pdf"]))
+"""
+
+import asyncio
+import functools
+
+from anthropic import APIError
+
+from classify_and_extract_agent import ClassifyAndExtractAgent
+from invoice_agent import SKIP_CONFIDENCE, InvoiceAgent
+from pdf_utils import extract_text
+from router_agent import RouterAgent
+
+N_EXTRACTORS = 4   # Azure calls in flight
+N_CONSUMERS = 8    # Claude calls in flight - keep under your Anthropic rate limit
+QUEUE_SIZE = 8     # extracted documents waiting for a consumer
+
+
+async def route_then_extract(router: RouterAgent, invoice_agent: InvoiceAgent, document_text: str) -> dict:
+    """
+    Classify with the router, then extract invoice details only if needed.
+
+    Invoice extraction starts speculatively once the streamed router output
+    names the document an invoice with confidence below SKIP_CONFIDENCE (the
+    gate would trigger the call anyway), instead of after the router finishes.
+
+    Returns:
+        dict shaped like ClassifyAndExtractAgent.run() output
+    """
+    speculative = []
+
+    def on_classified(document_type: str, confidence: float):
+        if document_type == "invoice" and confidence < SKIP_CONFIDENCE:
+            speculative.append(asyncio.create_task(invoice_agent.extract_async(document_text)))
+
+    routed = await router.classify_stream(document_text, on_classified)
+    pending = speculative[0] if speculative else None
+    invoice = None
+    if routed["document_type"] == "invoice":
+        invoice = await invoice_agent.extract_if_needed_async(document_text, routed, pending)
+    elif pending is not None:
+        pending.cancel()  # a validation retry changed the router's answer
+    return {
+        "document_type": routed["document_type"],
+        "metadata": {k: v for k, v in routed.items() if k != "document_type"},
+        "invoice": invoice,
+    }
+
+
+async def run_pipeline(
+    paths: list[str], n_extractors: int = N_EXTRACTORS, n_consumers: int = N_CONSUMERS, two_stage: bool = False
+) -> list[dict]:
+    """
+    Extract text from each PDF and classify + extract it.
+
+    Args:
+        paths: PDF file paths
+        n_extractors: Number of concurrent Azure extractions
+        n_consumers: Number of concurrent Claude calls
+        two_stage: Use RouterAgent + InvoiceAgent instead of ClassifyAndExtractAgent
+
+    Returns:
+        One ClassifyAndExtractAgent-shaped result per path, in the same order,
+        each with a "_source" entry (path, text preview). PDFs that fail text
+        extraction or the Claude call get {"error": ...} instead of agent output.
+    """
+    if two_stage:
+        process = functools.partial(route_then_extract, RouterAgent(), InvoiceAgent())
+    else:
+        process = ClassifyAndExtractAgent().run_async
+    queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    results: list[dict] = [{} for _ in paths]
+    pending = iter(enumerate(paths))  # shared by the extractors
+
+    async def extractor():
+        for i, path in pending:
+            try:
+                # Azure SDK is sync, so run it in a thread to keep the event loop free
+                text = await asyncio.to_thread(extract_text, path)
+            except (OSError, RuntimeError, ValueError) as e:
+                results[i] = {"error": str(e), "_source": {"path": path, "text_preview": ""}}
+                continue
+            await queue.put((i, path, text))
+
+    async def producer():
+        await asyncio.gather(*(extractor() for _ in range(n_extractors)))
+        for _ in range(n_consumers):
+            await queue.put(None)  # tell each consumer to stop
+
+    async def consumer():
+        while (item := await queue.get()) is not None:
+            i, path, text = item
+            source = {"path": path, "text_preview": text[:500]}
+            try:
+                result = await process(text)
+            except APIError as e:
+                # Non-retryable, or the last error once retries ran out: fail this document, not the batch
+                results[i] = {"error": f"Claude call failed: {e}", "_source": source}
+                continue
+            result["_source"] = source
+            results[i] = result
+
+    await asyncio.gather(producer(), *(consumer() for _ in range(n_consumers)))
+    return results
@@ -3,34 +3,72 @@ PDF Utilities - Extract text from PDFs using Azure Document Intelligence.
 
 Preprocessing step before router_agent.py and invoice_agent.py.
 
+extract_text results are cached in .pdf_text_cache/ (one file per PDF,
+named by its SHA-256). Delete the directory to force re-extraction.
+Requires Python 3.11+ (hashlib.file_digest).
+
 Usage:
     from pdf_utils import extract_text
     
     text = extract_text("document.pdf")
 """
 
+import functools
+import hashlib
 import os
 import sys
+import tempfile
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.core.credentials import AzureKeyCredential
-from dotenv import load_dotenv
 
-load_dotenv()
+from config import AZURE_DOC_INTEL_ENDPOINT, AZURE_DOC_INTEL_KEY, PDF_TEXT_CACHE_DIR
+from telemetry import timed
+
+# How often to poll the analyze job. The SDK falls back to 30s when the
+# service doesn't send Retry-After, which adds latency to short documents.
+POLLING_INTERVAL_SECONDS = 1
 
 
+@functools.lru_cache(maxsize=1)
 def _get_client() -> DocumentIntelligenceClient:
-    """Create and return Azure Document Intelligence client."""
-    endpoint = os.getenv("AZURE_DOC_INTEL_ENDPOINT")
-    key = os.getenv("AZURE_DOC_INTEL_KEY")
-    if not endpoint or not key:
+    """Return the shared Azure Document Intelligence client (created on first use)."""
+    if not AZURE_DOC_INTEL_ENDPOINT or not AZURE_DOC_INTEL_KEY:
         raise ValueError("Missing AZURE_DOC_INTEL_ENDPOINT or AZURE_DOC_INTEL_KEY in .env")
-    return DocumentIntelligenceClient(endpoint, AzureKeyCredential(key))
+    return DocumentIntelligenceClient(AZURE_DOC_INTEL_ENDPOINT, AzureKeyCredential(AZURE_DOC_INTEL_KEY))
+
+
+@timed("pdf.azure_read")  # only the Azure call; text cache hits aren't timed
+def _read_text(body) -> str:
+    """Run prebuilt-read on a PDF stream and return its text (pages without text are skipped)."""
+    try:
+        client = _get_client()
+        poller = client.begin_analyze_document(
+            "prebuilt-read", body=body, polling_interval=POLLING_INTERVAL_SECONDS
+        )
+        result = poller.result()
+    except Exception as e:
+        raise RuntimeError(f"Failed to extract text: {e}")
+    
+    # One pass over every line, skipping pages with no text
+    return "\n".join(line.content for page in result.pages for line in (page.lines or []))
+
+
+def _save_cached_text(cache_path: str, text: str) -> None:
+    """Write extracted text to the cache (write then rename, so readers never see partial files)."""
+    os.makedirs(PDF_TEXT_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=PDF_TEXT_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
 
 
 def extract_text(file_path: str) -> str:
     """
     Extract text from a PDF using prebuilt-read model.
     
+    Results are cached by the SHA-256 of the PDF bytes, so re-running on
+    an unchanged file skips Azure.
+    
     Args:
         file_path: Path to the PDF file
         
@@ -40,21 +78,20 @@ def extract_text(file_path: str) -> str:
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
-    try:
-        client = _get_client()
-        with open(file_path, "rb") as f:
-            poller = client.begin_analyze_document("prebuilt-read", body=f)
-        result = poller.result()
-        
-        # Combine all page content
-        text_parts = []
-        for page in result.pages:
-            for line in page.lines or []:
-                text_parts.append(line.content)
-        return "\n".join(text_parts)
+    # file_digest streams the file through the hash in C without loading it
+    # into memory (Python 3.11+)
+    with open(file_path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    cache_path = os.path.join(PDF_TEXT_CACHE_DIR, f"{digest}.txt")
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
     
-    except Exception as e:
-        raise RuntimeError(f"Failed to extract text: {e}")
+    # Only on a miss: hand the SDK a file object so it streams the upload
+    with open(file_path, "rb") as f:
+        text = _read_text(f)
+    _save_cached_text(cache_path, text)
+    return text
 
 
 # TODO: Fix extract_invoice function - SDK field access issues
@@ -13,18 +13,77 @@ Usage:
     agent = RouterAgent()
     result = agent.classify("text content of document")
     print(result)
+
+    # Many documents at once (overlaps the network round-trips)
+    results = asyncio.run(agent.classify_batch(docs, concurrency=8))
+
+    # Streamed: on_classified fires as soon as the type and confidence are
+    # emitted, before the rest of the metadata has been generated
+    result = await agent.classify_stream(text, on_classified=print)
 """
 
 import os
 import json
-from anthropic import Anthropic
-from dotenv import load_dotenv
+import re
+import time
+from typing import Callable
+
+from agent_base import Agent
+from llm_utils import gather_bounded
+from schemas import RouterClassification
+from telemetry import timed
+
+
+TOOL_NAME = "emit_classification"
+ROUTER_MAX_TOKENS = 400  # the classification schema is small and fixed
+
+# A complete "document_type": "..." pair in the partial tool input. The closing
+# quote matters: "inv" must not be mistaken for a finished value.
+_DOCUMENT_TYPE_RE = re.compile(r'"document_type"\s*:\s*"([a-z_]+)"')
+# Likewise a confidence followed by its delimiter, so "0.9" isn't read from "0.95"
+_CONFIDENCE_RE = re.compile(r'"confidence"\s*:\s*(\d+(?:\.\d+)?)\s*[,}]')
 
-load_dotenv()
+SYSTEM_PROMPT = """You are a document classification agent for a property development company.
 
+Your job is to look at a document and determine:
+1. What TYPE of document is it?
+2. Key metadata you can extract from it
+
+Document types:
+- invoice: A bill requesting payment for goods/services
+- progress_claim: A claim from a contractor for completed work stages
+- contract: A formal agreement between parties
+- variation: A change order or amendment to existing contract
+- settlement: Property settlement statement
+- unknown: Cannot determine
+
+Confidence scoring:
+- 0.9+ : Document explicitly states its type (e.g., "TAX INVOICE" header)
+- 0.7-0.9 : Strongly implied by format and content
+- 0.5-0.7 : Reasonable guess based on content
+- Below 0.5 : Uncertain, might need human review
 
-class RouterAgent:
+Record your answer by calling the emit_classification tool. Example input:
+{
+    "document_type": "invoice",
+    "confidence": 0.95,
+    "vendor_name": "Smith Constructions Pty Ltd",
+    "project_name": "Balmoral Estate",
+    "document_date": "2024-03-15",
+    "amount": 24750.00,
+    "reasoning": "Document has TAX INVOICE header, ABN, GST breakdown..."
+}
+
+If a field cannot be determined, use null."""
+
+
+class RouterAgent(Agent):
     """Classifies documents and extracts basic metadata."""
+
+    schema = RouterClassification
+    tool_name = TOOL_NAME
+    prompt_version = "v2"  # Track this for evaluation
+    system_prompt = SYSTEM_PROMPT
     
     # The document types we care about
     DOCUMENT_TYPES = [
@@ -35,12 +94,8 @@ class RouterAgent:
         "settlement",
         "unknown"
     ]
-    
-    def __init__(self):
-        self.client = Anthropic()
-        self.model = "claude-sonnet-4-20250514"
-        self.prompt_version = "v1"  # Track this for evaluation
         
+    @timed("router.classify")
     def classify(self, document_text: str) -> dict:
         """
         Classify a document and extract metadata.
@@ -58,79 +113,92 @@ class RouterAgent:
                 - amount: float or None
                 - reasoning: str explaining the classification
         """
+        return self._run(document_text)
+
+    @timed("router.classify")
+    async def classify_async(self, document_text: str) -> dict:
+        """
+        Async version of classify().
         
-        system_prompt = """You are a document classification agent for a property development company.
+        Args:
+            document_text: The text content of the document
+            
+        Returns:
+            dict with the same keys as classify()
+        """
+        return await self._run_async(document_text)
 
-Your job is to look at a document and determine:
-1. What TYPE of document is it?
-2. Key metadata you can extract from it
+    @timed("router.classify_stream")
+    async def classify_stream(self, document_text: str, on_classified: Callable[[str, float], None]) -> dict:
+        """
+        Like classify_async(), but calls on_classified as soon as the type and confidence are known.
 
-Document types:
-- invoice: A bill requesting payment for goods/services
-- progress_claim: A claim from a contractor for completed work stages
-- contract: A formal agreement between parties
-- variation: A change order or amendment to existing contract
-- settlement: Property settlement statement
-- unknown: Cannot determine
+        The response is streamed and the partial tool input is watched for
+        document_type and confidence, which come first in the schema - so the
+        callback fires after a few dozen output tokens while the rest of the
+        metadata is still being generated. It fires exactly once per call:
+        from the cache on a hit, otherwise from the stream, or from the final
+        result if the pair was never seen mid-stream (e.g. the output failed
+        validation).
 
-Confidence scoring:
-- 0.9+ : Document explicitly states its type (e.g., "TAX INVOICE" header)
-- 0.7-0.9 : Strongly implied by format and content
-- 0.5-0.7 : Reasonable guess based on content
-- Below 0.5 : Uncertain, might need human review
+        The streamed values can differ from the returned ones if a validation
+        retry changes Claude's answer, so callers should check the result.
 
-You MUST respond with valid JSON only, no other text. Use this exact structure:
-{
-    "document_type": "invoice",
-    "confidence": 0.95,
-    "vendor_name": "Smith Constructions Pty Ltd",
-    "project_name": "Balmoral Estate",
-    "document_date": "2024-03-15",
-    "amount": 24750.00,
-    "reasoning": "Document has TAX INVOICE header, ABN, GST breakdown..."
-}
+        Args:
+            document_text: The text content of the document
+            on_classified: Called with (one of DOCUMENT_TYPES, confidence)
 
-If a field cannot be determined, use null."""
+        Returns:
+            dict with the same keys as classify(); _meta also has ttft_ms,
+            the time until the first tool input token arrived
+        """
+        started = time.perf_counter()
+        seen = {}
+
+        def on_json(received: str):
+            seen.setdefault("ttft_ms", round((time.perf_counter() - started) * 1000, 1))
+            if "fired" in seen:
+                return
+            document_type = _DOCUMENT_TYPE_RE.search(received)
+            confidence = _CONFIDENCE_RE.search(received)
+            if document_type and confidence and document_type.group(1) in self.DOCUMENT_TYPES:
+                seen["fired"] = True
+                on_classified(document_type.group(1), float(confidence.group(1)))
+
+        result = await self._run_async(document_text, on_json=on_json)
+        if "ttft_ms" in seen:
+            result["_meta"]["ttft_ms"] = seen["ttft_ms"]
+        if "fired" not in seen:
+            on_classified(result["document_type"], result["confidence"])
+        return result
+
+    async def classify_batch(self, docs: list[str], concurrency: int = 8) -> list[dict]:
+        """
+        Classify many documents concurrently.
+        
+        Args:
+            docs: Text content of each document
+            concurrency: Max requests in flight (keep under your rate limit)
+            
+        Returns:
+            List of classify() results, in the same order as docs
+        """
+        return await gather_bounded(self.classify_async, docs, concurrency)
 
-        user_message = f"""Classify this document:
+    def _user_message(self, document_text: str) -> str:
+        return f"""Classify this document:
 
 ---
 {document_text}
 ---
 
-Respond with JSON only."""
+Record your answer with the emit_classification tool."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1000,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_message}]
-        )
-        
-        # Parse the response
-        response_text = response.content[0].text
-        
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            # If Claude didn't return valid JSON, wrap the error
-            result = {
-                "document_type": "unknown",
-                "confidence": 0.0,
-                "vendor_name": None,
-                "project_name": None,
-                "document_date": None,
-                "amount": None,
-                "reasoning": f"Failed to parse response: {response_text[:200]}"
-            }
-        
-        # Add metadata for tracking
-        result["_meta"] = {
-            "model": self.model,
-            "prompt_version": self.prompt_version
-        }
-        
-        return result
+    def _max_tokens(self, document_text: str) -> int:
+        return ROUTER_MAX_TOKENS
+
+    def _failure(self, error: str) -> RouterClassification:
+        return RouterClassification(reasoning=f"Failed to get a valid classification: {error}")
 
 
 # Quick test if running directly
@@ -165,4 +233,4 @@ if __name__ == "__main__":
     """
     
     result = agent.classify(test_doc)
-    print(json.dumps(result, indent=2))
+    print(json.dumps(result, indent=2))
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Schemas - Pydantic models for agent outputs.
+
+Shared by the agents so each document type's schema is defined once.
+
+Usage:
+    from schemas import InvoiceExtraction, RouterClassification
+
+    invoice = InvoiceExtraction.model_validate(data)
+"""
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, model_validator
+
+
+DocumentType = Literal[
+    "invoice",
+    "progress_claim",
+    "contract",
+    "variation",
+    "settlement",
+    "unknown",
+]
+
+
+class LineItem(BaseModel):
+    """A single line on an invoice."""
+
+    description: Optional[str] = None
+    quantity: Optional[float] = None
+    unit_price: Optional[float] = None
+    amount: Optional[float] = None
+
+
+class RouterClassification(BaseModel):
+    """Document type and basic metadata for a classified document."""
+
+    document_type: DocumentType = "unknown"
+    confidence: float = 0.0
+    vendor_name: Optional[str] = None
+    project_name: Optional[str] = None
+    document_date: Optional[str] = None
+    amount: Optional[float] = None
+    reasoning: Optional[str] = None
+
+
+class InvoiceExtraction(BaseModel):
+    """Detailed fields extracted from an invoice."""
+
+    invoice_number: Optional[str] = None
+    vendor_name: Optional[str] = None
+    vendor_abn: Optional[str] = None
+    invoice_date: Optional[str] = None
+    due_date: Optional[str] = None
+    project_reference: Optional[str] = None
+    description: Optional[str] = None
+    line_items: list[LineItem] = []
+    subtotal: Optional[float] = None
+    gst_amount: Optional[float] = None
+    total_inc_gst: Optional[float] = None
+    payment_terms: Optional[str] = None
+
+
+class DocumentMetadata(BaseModel):
+    """Basic metadata the router extracts from any document."""
+
+    confidence: float = 0.0
+    vendor_name: Optional[str] = None
+    project_name: Optional[str] = None
+    document_date: Optional[str] = None
+    amount: Optional[float] = None
+    reasoning: Optional[str] = None
+
+
+class ClassifyAndExtractResult(BaseModel):
+    """Document type, basic metadata and (for invoices only) full invoice fields."""
+
+    document_type: DocumentType = "unknown"
+    metadata: DocumentMetadata = DocumentMetadata()
+    invoice: Optional[InvoiceExtraction] = None
+
+    @model_validator(mode="after")
+    def _invoice_only_for_invoices(self):
+        if self.document_type != "invoice":
+            self.invoice = None
+        return self
@@ -0,0 +1,125 @@
+"""
+Telemetry - Per-stage timing and token counts for the pipeline.
+
+Decorate a pipeline stage with @timed("stage_name") and every call appends
+one JSON line to telemetry.jsonl (set TELEMETRY_PATH in .env to move it, or
+to an empty string to turn it off). Token counts are read from the result's
+_meta["usage"], which the agents fill in.
+
+Usage:
+    from telemetry import timed
+
+    @timed("router.classify")
+    def classify(self, document_text: str) -> dict:
+        ...
+
+    # Per-stage breakdown
+    python telemetry.py
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+from config import TELEMETRY_PATH
+
+_write_lock = threading.Lock()  # extract_text runs in worker threads
+
+
+def _record(stage: str, started: float, result, error: bool = False, cancelled: bool = False) -> None:
+    """Append one timing record for a finished, failed or cancelled call."""
+    if not TELEMETRY_PATH:
+        return
+    meta = result.get("_meta", {}) if isinstance(result, dict) else {}
+    usage = meta.get("usage", {})
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "stage": stage,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "cache_read_input_tokens": usage.get("cache_read_input_tokens", 0),
+        "ttft_ms": meta.get("ttft_ms"),
+        "cached": meta.get("cached", False),
+        "error": error or (isinstance(result, dict) and "error" in result),
+        "cancelled": cancelled,
+    }
+    with _write_lock, open(TELEMETRY_PATH, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def timed(stage: str):
+    """
+    Decorator recording wall time (and token usage, if any) of each call to a stage.
+
+    Calls that raise are recorded with error=True and cancelled tasks with
+    cancelled=True; the exception is always re-raised.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    _record(stage, started, None, cancelled=True)
+                    raise
+                except Exception:
+                    _record(stage, started, None, error=True)
+                    raise
+                _record(stage, started, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                _record(stage, started, None, error=True)
+                raise
+            _record(stage, started, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def summarize(path: str = TELEMETRY_PATH):
+    """
+    Per-stage breakdown of the recorded calls.
+
+    Returns:
+        pandas DataFrame indexed by stage: calls, cache hits, errors, cancellations,
+        p50/p95/mean duration, median time to first token (streamed stages
+        only) and total tokens
+    """
+    import pandas as pd
+
+    df = pd.read_json(path, lines=True)
+    if "ttft_ms" not in df:
+        df["ttft_ms"] = None  # only streamed stages record it
+    if "cancelled" not in df:
+        df["cancelled"] = False  # files written before it was recorded
+    return df.groupby("stage").agg(
+        calls=("duration_ms", "size"),
+        cache_hits=("cached", "sum"),
+        errors=("error", "sum"),
+        cancelled=("cancelled", "sum"),
+        p50_ms=("duration_ms", "median"),
+        p95_ms=("duration_ms", lambda d: d.quantile(0.95)),
+        mean_ms=("duration_ms", "mean"),
+        p50_ttft_ms=("ttft_ms", "median"),
+        input_tokens=("input_tokens", "sum"),
+        output_tokens=("output_tokens", "sum"),
+        cache_read_input_tokens=("cache_read_input_tokens", "sum"),
+    ).sort_values("mean_ms", ascending=False)
+
+
+if __name__ == "__main__":
+    print(summarize().to_string())
@@ -0,0 +1,47 @@
+"""
+Test the shared config module
+
+Checks that .env is parsed once per process, not once per module. Run it with:
+    python test_config.py
+
+No API keys needed - nothing here calls Claude or Azure.
+"""
+
+import importlib
+import sys
+
+import dotenv
+
+PIPELINE_MODULES = ["config", "cache", "telemetry", "agent_base", "router_agent", "invoice_agent", "classify_and_extract_agent", "pdf_utils"]
+
+
+def test_dotenv_loaded_once():
+    """Importing every pipeline module should call load_dotenv exactly once."""
+    
+    calls = []
+    original = dotenv.load_dotenv
+    
+    def counting_load_dotenv(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+    
+    # Fresh imports with a counting load_dotenv
+    saved = {name: sys.modules.pop(name) for name in PIPELINE_MODULES if name in sys.modules}
+    dotenv.load_dotenv = counting_load_dotenv
+    try:
+        for name in PIPELINE_MODULES:
+            importlib.import_module(name)
+    finally:
+        dotenv.load_dotenv = original
+        sys.modules.update(saved)
+    
+    loaded_once = len(calls) == 1
+    print(f"  [{'✓' if loaded_once else '✗'}] load_dotenv called once (got {len(calls)})")
+    assert loaded_once
+    return loaded_once
+
+
+if __name__ == "__main__":
+    print("\n🚀 Running Config Tests\n")
+    passed = test_dotenv_loaded_once()
+    print(f"\nOVERALL: {'PASS ✓' if passed else 'FAIL ✗'}")
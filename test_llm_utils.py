@@ -0,0 +1,72 @@
+"""
+Test the max_tokens sizing in llm_utils
+
+Checks estimate_max_tokens() and that max_tokens retries stay under
+MAX_OUTPUT_TOKENS. Run it with:
+    python test_llm_utils.py
+
+No API keys needed - Claude is replaced by a fake client.
+"""
+
+from types import SimpleNamespace
+
+from llm_utils import MAX_OUTPUT_TOKENS, create_validated, estimate_max_tokens
+from schemas import InvoiceExtraction
+
+
+def check(name: str, passed: bool) -> bool:
+    print(f"  [{'✓' if passed else '✗'}] {name}")
+    return passed
+
+
+def test_estimate_max_tokens():
+    """Whole-dollar and cents amounts count as line items; the floor and cap hold."""
+
+    whole_dollars = "\n".join(f"Item {i}   $1,500   $3,000" for i in range(15))
+    with_cents = "\n".join(f"Item {i}   1,500.00" for i in range(5))
+    results = [
+        check("whole-dollar amounts count as line items", estimate_max_tokens(whole_dollars) == 300 + 80 * 15),
+        check("amounts with cents count as line items", estimate_max_tokens(with_cents) == 300 + 80 * 5),
+        check("no amounts gets the header-only floor", estimate_max_tokens("TAX INVOICE\nSmith Pty Ltd") == 600),
+        check("long invoices are capped", estimate_max_tokens(with_cents * 50) == MAX_OUTPUT_TOKENS),
+    ]
+    assert all(results)
+    return all(results)
+
+
+def test_max_tokens_retry_is_capped():
+    """A response that always stops at max_tokens gets bounded retries, then an error."""
+
+    budgets = []
+
+    def create(**request):
+        budgets.append(request["max_tokens"])
+        return SimpleNamespace(
+            stop_reason="max_tokens",
+            usage=SimpleNamespace(input_tokens=1, output_tokens=request["max_tokens"]),
+            content=[SimpleNamespace(type="tool_use", id="t", name="emit_invoice", input={})],
+        )
+
+    client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    messages = [{"role": "user", "content": "invoice"}]
+
+    parsed, error, _ = create_validated(client, InvoiceExtraction, "emit_invoice",
+                                        model="m", max_tokens=400, messages=messages)
+    small = list(budgets)
+    budgets.clear()
+    create_validated(client, InvoiceExtraction, "emit_invoice",
+                     model="m", max_tokens=MAX_OUTPUT_TOKENS, messages=messages)
+
+    results = [
+        check("budget doubles up to the cap", small == [400, 800, 1600]),
+        check("cut-off output is an error", parsed is None and "cut off" in (error or "")),
+        check("no retry once already at the cap", budgets == [MAX_OUTPUT_TOKENS]),
+    ]
+    assert all(results)
+    return all(results)
+
+
+if __name__ == "__main__":
+    print("\n🚀 Running LLM Utils Tests\n")
+    passed = all([test_estimate_max_tokens(), test_max_tokens_retry_is_capped()])
+    print(f"\nOVERALL: {'PASS ✓' if passed else 'FAIL ✗'}")
@@ -0,0 +1,68 @@
+"""
+Test the evaluation scoring rules
+
+Checks score_fields() on hand-built DataFrames. Run it with:
+    python test_metrics.py
+
+No API keys needed - nothing here calls Claude or Azure.
+"""
+
+import pandas as pd
+
+from evaluation.metrics import score_fields
+
+RULES = {
+    "vendor_name": "contains",
+    "amount": "numeric_tolerance_1.0",
+    "document_type": "exact",
+}
+
+
+def check(name: str, passed: bool) -> bool:
+    print(f"  [{'✓' if passed else '✗'}] {name}")
+    return passed
+
+
+def test_score_fields():
+    """Each rule should match, reject, and treat None / bad values as no match."""
+
+    expected = pd.DataFrame([
+        {"vendor_name": "Smith Concreting", "amount": 24200.0, "document_type": "invoice"},
+        {"vendor_name": "None", "amount": "1,500", "document_type": "contract"},
+        {"vendor_name": "Acme", "amount": 100.0, "document_type": "invoice"},
+    ], index=["doc_1", "doc_2", "doc_3"])
+    # doc_3 is missing entirely
+    actual = pd.DataFrame([
+        {"vendor_name": "smith concreting pty ltd", "amount": "24200.50", "document_type": "invoice"},
+        {"vendor_name": None, "amount": 1500.0, "document_type": None},
+    ], index=["doc_1", "doc_2"])
+
+    matches = score_fields(expected, actual, RULES)
+    results = [
+        check("contains is case-insensitive substring", bool(matches.loc["doc_1", "vendor_name"])),
+        check("numeric tolerance parses numeric strings", bool(matches.loc["doc_1", "amount"])),
+        check("exact matches equal values", bool(matches.loc["doc_1", "document_type"])),
+        check("None never matches via 'none'", not matches.loc["doc_2", "vendor_name"]),
+        check("unparseable number never matches", not matches.loc["doc_2", "amount"]),
+        check("None doesn't match an exact value", not matches.loc["doc_2", "document_type"]),
+        check("missing document never matches", not matches.loc["doc_3"].any()),
+        check("result has expected's shape", matches.shape == expected.shape),
+    ]
+
+    missing_field = score_fields(expected, actual.drop(columns=["amount"]), RULES)
+    results.append(check("missing field never matches", not missing_field["amount"].any()))
+
+    try:
+        score_fields(expected, actual, {"amount": "fuzzy"})
+        results.append(check("unknown rule raises ValueError", False))
+    except ValueError:
+        results.append(check("unknown rule raises ValueError", True))
+
+    assert all(results)
+    return all(results)
+
+
+if __name__ == "__main__":
+    print("\n🚀 Running Metrics Tests\n")
+    passed = test_score_fields()
+    print(f"\nOVERALL: {'PASS ✓' if passed else 'FAIL ✗'}")
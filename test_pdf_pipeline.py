@@ -1,24 +1,47 @@
-from pdf_utils import extract_text
-from router_agent import RouterAgent
-from invoice_agent import InvoiceAgent
+"""
+Run the full pipeline over one or more PDFs.
+
+    python test_pdf_pipeline.py                    # the sample invoice
+    python test_pdf_pipeline.py a.pdf b.pdf ...    # processed concurrently
+    python test_pdf_pipeline.py --two-stage ...    # router, then invoice agent if needed
+
+See orchestrator.py for how extraction and classification overlap.
+"""
+
+import asyncio
 import json
+import sys
+
+from invoice_agent import GATE_COUNTS
+from orchestrator import run_pipeline
+
+
+if __name__ == "__main__":
+    two_stage = "--two-stage" in sys.argv
+    paths = [arg for arg in sys.argv[1:] if arg != "--two-stage"] or ['Invoice INV-0911.pdf']
+    results = asyncio.run(run_pipeline(paths, two_stage=two_stage))
+
+    for result in results:
+        print(f"\n##### {result['_source']['path']}")
+        if "document_type" not in result:
+            print(f"Failed: {result['error']}")
+            continue
+
+        # Step 1: Extracted text
+        print("=== Extracted Text ===")
+        print(result["_source"]["text_preview"])
+
+        # Step 2: Classification
+        print("\n=== Classification + Extraction ===")
+        print(json.dumps(result["metadata"], indent=2))
+
+        # Step 3: Route on document type
+        if result["document_type"] == "invoice":
+            print("\n=== Invoice Extraction ===")
+            print(json.dumps(result["invoice"], indent=2))
+        else:
+            print(f"\nNo invoice data - document is: {result['document_type']}")
 
-# Step 1: Extract text from PDF
-text = extract_text('Invoice INV-0911.pdf')
-print("=== Extracted Text ===")
-print(text[:500])  # First 500 chars
-
-# Step 2: Classify with router
-print("\n=== Router Classification ===")
-router = RouterAgent()
-router_result = router.classify(text)
-print(json.dumps(router_result, indent=2))
-
-# Step 3: Extract invoice details (only if it's an invoice)
-if router_result.get("document_type") == "invoice":
-    print("\n=== Invoice Extraction ===")
-    invoice_agent = InvoiceAgent()
-    extraction = invoice_agent.extract(text)
-    print(json.dumps(extraction, indent=2))
-else:
-    print(f"\nSkipping invoice extraction - document is: {router_result.get('document_type')}")
\ No newline at end of file
+    if two_stage:
+        print(f"\nDetailed invoice extraction: {GATE_COUNTS['skipped']} skipped, "
+              f"{GATE_COUNTS['triggered']} triggered, {GATE_COUNTS['cancelled']} cancelled")
@@ -9,6 +9,8 @@ Later, you'll convert this to proper pytest tests with evaluation metrics.
 
 import json
 import time
+import pandas as pd
+from evaluation.metrics import score_fields
 from router_agent import RouterAgent
 
 
@@ -95,34 +97,26 @@ def test_against_expected():
     agent = RouterAgent()
     actual = agent.classify(doc_text)
     
-    # Compare each field
+    # Compare each field (one row per document, so more samples can be added)
+    rules = {
+        "document_type": "exact",
+        "vendor_name": "contains",          # Case-insensitive contains
+        "project_name": "contains",
+        "amount": "numeric_tolerance_1.0"   # Numeric tolerance
+    }
+    expected_df = pd.DataFrame([expected], index=["sample_invoice.txt"])
+    actual_df = pd.DataFrame([actual], index=["sample_invoice.txt"])
+    matches = score_fields(expected_df, actual_df, rules)
+    
     print("\nField-by-field comparison:")
     print("-" * 40)
     
-    scores = []
-    for field, expected_value in expected.items():
-        actual_value = actual.get(field)
-        
-        # Simple matching logic (you'll make this smarter)
-        if field == "amount":
-            # Numeric tolerance
-            try:
-                match = abs(float(expected_value) - float(actual_value)) < 1.0
-            except (TypeError, ValueError):
-                match = False
-        elif field in ["vendor_name", "project_name"]:
-            # Case-insensitive contains
-            match = (expected_value.lower() in str(actual_value).lower() or
-                     str(actual_value).lower() in expected_value.lower())
-        else:
-            # Exact match
-            match = expected_value == actual_value
-        
-        scores.append(1.0 if match else 0.0)
+    scores = matches.loc["sample_invoice.txt"].astype(float).tolist()
+    for field, match in matches.loc["sample_invoice.txt"].items():
         status = "✓" if match else "✗"
         print(f"  [{status}] {field}")
-        print(f"      Expected: {expected_value}")
-        print(f"      Actual:   {actual_value}")
+        print(f"      Expected: {expected[field]}")
+        print(f"      Actual:   {actual.get(field)}")
     
     accuracy = sum(scores) / len(scores) if scores else 0
     print("-" * 40)